@@ -0,0 +1,39 @@
+# services/backend/app/clustering.py
+"""Centroid bookkeeping for the topic clustering loop (numpy/scipy only)."""
+import itertools
+from typing import Dict
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+
+def stabilize_labels(labels, centers, previous: Dict[int, np.ndarray]):
+    """Renumber clusters to the id of the matching previous-cycle centroid.
+
+    Centroids are paired with `previous` ({topic id: centroid}) by minimum
+    total squared distance (Hungarian assignment); clusters left unmatched
+    take the lowest free ids. Returns (labels, {topic id: centroid}).
+    """
+    mapping = {}
+    if previous:
+        old_ids = list(previous)
+        old = np.stack([previous[i] for i in old_ids])
+        cost = ((centers[:, None, :] - old[None, :, :]) ** 2).sum(axis=2)
+        new_idx, old_idx = linear_sum_assignment(cost)
+        mapping = {int(n): old_ids[o] for n, o in zip(new_idx, old_idx)}
+    free = (i for i in itertools.count() if i not in set(mapping.values()))
+    for j in range(len(centers)):
+        if j not in mapping:
+            mapping[j] = next(free)
+    by_id = {mapping[j]: centers[j] for j in range(len(centers))}
+    return np.array([mapping[int(lab)] for lab in labels]), by_id
+
+
+def representative_mentions(rows, labels, embeddings, centers):
+    """Map cluster id -> the mention whose embedding is closest to its centroid."""
+    reps = {}
+    for cid in np.unique(labels):
+        idx = np.flatnonzero(labels == cid)
+        dist = np.sum((embeddings[idx] - centers[cid]) ** 2, axis=1)
+        reps[int(cid)] = rows[idx[int(np.argmin(dist))]]
+    return reps
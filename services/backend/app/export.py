@@ -0,0 +1,231 @@
+# services/backend/app/export.py
+"""Streaming bulk export of mentions.
+
+Rows are pulled from the database in fixed-size batches through a
+server-side cursor (``yield_per``), so memory stays flat no matter how
+many mentions match and clients start receiving data immediately.
+"""
+import csv
+import heapq
+import io
+import itertools
+import json
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+
+from app.db import SessionLocal
+from app.models import Mention
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # columnar formats are optional
+    pa = None
+    pq = None
+
+EXPORT_BATCH_SIZE = 1000      # rows fetched per round-trip / written per chunk
+
+EXPORT_COLUMNS = [
+    "id",
+    "source",
+    "source_id",
+    "author",
+    "text",
+    "url",
+    "published_at",
+    "sentiment",
+    "reach",
+    "cluster_id",
+]
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+COLUMNAR_FORMATS = {"parquet", "arrow"}
+
+
+def arrow_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("source", pa.string()),
+        ("source_id", pa.string()),
+        ("author", pa.string()),
+        ("text", pa.string()),
+        ("url", pa.string()),
+        ("published_at", pa.timestamp("us")),
+        ("sentiment", pa.string()),
+        ("reach", pa.float64()),
+        ("cluster_id", pa.int64()),
+    ])
+
+
+def naive_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    """published_at is stored as naive UTC; bring filter bounds in line."""
+    if dt is not None and dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def iter_mention_batches(
+    db,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[List[Dict]]:
+    """Yield lists of plain mention dicts, oldest first, `batch_size` at a time.
+
+    Only the exported columns are selected (no ORM identity map), and
+    ``yield_per`` makes the driver use a server-side cursor where supported.
+    """
+    stmt = select(*[getattr(Mention, c) for c in EXPORT_COLUMNS])
+    if start is not None:
+        stmt = stmt.where(Mention.published_at >= start)
+    if end is not None:
+        stmt = stmt.where(Mention.published_at < end)
+    if source:
+        stmt = stmt.where(Mention.source == source)
+    stmt = stmt.order_by(Mention.published_at.asc().nulls_first(), Mention.id.asc())
+    result = db.execute(stmt, execution_options={"yield_per": batch_size})
+    for partition in result.partitions():
+        yield [row._asdict() for row in partition]
+
+
+def _sort_key(row: Dict):
+    return (row["published_at"] or datetime.min, row["id"])
+
+
+def merge_batches(streams: Iterable[Iterable[List[Dict]]],
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """Merge batch streams that are each sorted by (published_at, id) into one sorted stream."""
+    rows = heapq.merge(*[itertools.chain.from_iterable(s) for s in streams], key=_sort_key)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _json_row(row: Dict) -> Dict:
+    out = dict(row)
+    if out.get("published_at") is not None:
+        out["published_at"] = out["published_at"].isoformat()
+    return out
+
+
+def to_ndjson(batches: Iterable[List[Dict]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(json.dumps(_json_row(r)) + "\n" for r in batch).encode("utf-8")
+
+
+def to_csv(batches: Iterable[List[Dict]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    yield buf.getvalue().encode("utf-8")
+    for batch in batches:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(_json_row(r) for r in batch)
+        yield buf.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """Minimal writable file that hands written bytes back to the caller."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self.chunks)
+        self.chunks = []
+        return out
+
+
+def _record_batch(batch: List[Dict], schema):
+    return pa.RecordBatch.from_pylist(batch, schema=schema)
+
+
+def to_parquet(batches: Iterable[List[Dict]]) -> Iterator[bytes]:
+    """One Parquet row group per database batch, flushed as it is written."""
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    try:
+        for batch in batches:
+            writer.write_batch(_record_batch(batch, schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def to_arrow(batches: Iterable[List[Dict]]) -> Iterator[bytes]:
+    """Arrow IPC stream format: one record batch per database batch."""
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        for batch in batches:
+            writer.write_batch(_record_batch(batch, schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+WRITERS = {
+    "ndjson": to_ndjson,
+    "csv": to_csv,
+    "parquet": to_parquet,
+    "arrow": to_arrow,
+}
+
+
+def stream_export(
+    fmt: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    archived_batches: Optional[Iterable[List[Dict]]] = None,
+) -> Iterator[bytes]:
+    """Encode matching mentions in `fmt`; owns its DB session for the stream's lifetime.
+
+    `archived_batches`, if given, must be sorted by (published_at, id) like
+    the hot query; the two are merged so the output is oldest first overall.
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    db = SessionLocal()
+    try:
+        batches = iter_mention_batches(db, start, end, source, batch_size)
+        if archived_batches is not None:
+            batches = merge_batches([archived_batches, batches], batch_size)
+        for chunk in WRITERS[fmt](batches):
+            if chunk:
+                yield chunk
+    finally:
+        db.close()
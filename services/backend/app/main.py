@@ -1,19 +1,28 @@
 import json
 import asyncio
 import os
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from datetime import datetime
+from typing import Optional
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 from .ws_manager import ConnectionManager
 from .db import SessionLocal, engine
-from .models import Base, Mention, Alert
+from .models import Base, Mention, MentionSourceId, Alert
+from . import export, storage, topics
 
-# Disable NLP tasks for production deployment stability
-TASKS_ENABLED = False
-print("NLP tasks disabled for production deployment stability")
+# NLP tasks (clustering, topic summaries, spike alerts) are opt-in: they load
+# sentence-transformers/sklearn, which the minimal deployment doesn't ship
+TASKS_ENABLED = os.getenv("TASKS_ENABLED", "false").lower() in ("1", "true", "yes")
+if TASKS_ENABLED:
+    from . import tasks
+else:
+    print("NLP tasks disabled for production deployment stability (set TASKS_ENABLED=true)")
 
 # create tables (dev convenience)
 try:
+    storage.init_storage(engine)  # partitioned mentions table on Postgres
     Base.metadata.create_all(bind=engine)
     print("Database tables created successfully")
 except Exception as e:
@@ -55,6 +64,8 @@ async def startup_event():
         print("Background tasks started.")
     else:
         print("Background tasks disabled - running in minimal mode")
+    # partition upkeep and cold archival run regardless of NLP tasks
+    asyncio.get_event_loop().create_task(storage.run_periodic_lifecycle())
 
 @app.get("/")
 async def root():
@@ -72,7 +83,9 @@ async def root():
             "health": "/health",
             "api_docs": "/docs",
             "mentions": "/api/mentions",
+            "mentions_export": "/api/mentions/export",
             "alerts": "/api/alerts",
+            "topics": "/api/topics",
             "websocket": "/ws/mentions"
         },
         "repository": "https://github.com/Sathvik-2004/BrandGuard",
@@ -108,6 +121,38 @@ def list_mentions(limit: int = 50):
     finally:
         db.close()
 
+# Streaming bulk export (constant memory, server-side cursor)
+@app.get("/api/mentions/export")
+def export_mentions(
+    format: str = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source: Optional[str] = None,
+    archived: bool = True,
+):
+    """
+    Stream every mention matching the filters, oldest first.
+    format: ndjson | csv | parquet | arrow
+    start / end: ISO timestamps bounding published_at (end is exclusive)
+    archived: also include mentions compacted into cold Parquet archives
+    """
+    fmt = format.lower()
+    if fmt not in export.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'. Use one of: {', '.join(export.EXPORT_FORMATS)}")
+    if fmt in export.COLUMNAR_FORMATS and export.pa is None:
+        raise HTTPException(status_code=501, detail=f"{fmt} export requires pyarrow to be installed")
+    media_type, ext = export.EXPORT_FORMATS[fmt]
+    archived_batches = storage.iter_archived_batches(start, end, source) if archived else None
+    body = export.stream_export(fmt, start=start, end=end, source=source, archived_batches=archived_batches)
+    if archived:
+        # keep compaction from moving rows out from under a running export
+        body = storage.locked_export(body)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="mentions.{ext}"'},
+    )
+
 # POST endpoint to create mention (saves and broadcasts)
 @app.post("/api/mentions")
 async def create_mention(payload: dict):
@@ -145,6 +190,9 @@ async def create_mention(payload: dict):
             sentiment=payload.get("sentiment"),
             reach=payload.get("reach"),
         )
+        if m.source_id is not None:
+            # duplicate source ids fail here on every backend (IntegrityError)
+            db.add(MentionSourceId(source_id=m.source_id))
         db.add(m)
         db.commit()
         db.refresh(m)
@@ -198,6 +246,11 @@ def list_alerts(limit: int = 50):
     finally:
         db.close()
 
+# Cached topic summaries (refreshed once per clustering cycle)
+@app.get("/api/topics")
+def list_topics():
+    return topics.get_topics()
+
 # websocket endpoint for live clients
 @app.websocket("/ws/mentions")
 async def websocket_endpoint(websocket: WebSocket):
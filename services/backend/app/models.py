@@ -8,15 +8,23 @@ class Mention(Base):
     __tablename__ = "mentions"
     id = Column(Integer, primary_key=True, index=True)
     source = Column(String, index=True)
+    # unique here holds on SQLite and plain Postgres; a partitioned mentions
+    # table can only enforce (source_id, published_at), so global dedupe goes
+    # through MentionSourceId, written in the same transaction as the mention
     source_id = Column(String, unique=True, index=True)
     author = Column(String)
     text = Column(Text)
     url = Column(String)
-    published_at = Column(DateTime, default=datetime.datetime.utcnow)
+    published_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     sentiment = Column(String, nullable=True)
     reach = Column(Float, nullable=True)
     cluster_id = Column(Integer, nullable=True)   # new field
 
+class MentionSourceId(Base):
+    """Registry of ingested source ids; not partitioned, so it stays globally unique."""
+    __tablename__ = "mention_source_ids"
+    source_id = Column(String, primary_key=True)
+
 class Alert(Base):
     __tablename__ = "alerts"
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,528 @@
+# services/backend/app/storage.py
+"""Storage lifecycle for the mentions table.
+
+* Postgres: ``mentions`` is range-partitioned by month on ``published_at``
+  (plus a DEFAULT partition), so time-window queries only scan recent
+  partitions and expired months can be dropped wholesale.
+* SQLite: a single table with an index on ``published_at``.
+
+Months older than ``HOT_RETENTION_DAYS`` are compacted into zstd Parquet
+files under ``ARCHIVE_DIR/mentions/period=YYYY-MM/`` and removed from the
+hot table. Archived rows remain readable through ``/api/mentions/export``.
+
+Run by hand with ``python -m app.storage [init|partitions|compact|migrate]``.
+"""
+import asyncio
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import column, delete, func, inspect, select, table, text
+
+from app.db import engine as default_engine
+from app.export import (
+    EXPORT_BATCH_SIZE, EXPORT_COLUMNS, arrow_schema, merge_batches, naive_utc, pa, pq,
+)
+from app.models import Mention, MentionSourceId
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes run a single worker
+    fcntl = None
+
+HOT_RETENTION_DAYS = int(os.getenv("HOT_RETENTION_DAYS", "0"))   # 0 = keep everything hot
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+PARTITIONS_AHEAD = 2              # future monthly partitions to keep pre-created
+LIFECYCLE_INTERVAL_SECONDS = int(os.getenv("LIFECYCLE_INTERVAL_SECONDS", "3600"))
+LIFECYCLE_LOCK_KEY = 0x42475354   # pg advisory lock id ("BGST")
+
+TABLE = "mentions"
+DEFAULT_PARTITION = "mentions_default"
+
+# Postgres requires the partition key in every unique constraint, so the
+# primary key is (id, published_at) and source_id is only unique per
+# timestamp here; the mention_source_ids registry keeps it globally unique.
+PARTITIONED_DDL = [
+    """
+    CREATE TABLE mentions (
+        id SERIAL NOT NULL,
+        source VARCHAR,
+        source_id VARCHAR,
+        author VARCHAR,
+        text TEXT,
+        url VARCHAR,
+        published_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+        sentiment VARCHAR,
+        reach DOUBLE PRECISION,
+        cluster_id INTEGER,
+        PRIMARY KEY (id, published_at),
+        UNIQUE (source_id, published_at)
+    ) PARTITION BY RANGE (published_at)
+    """,
+    "CREATE INDEX ix_mentions_id ON mentions (id)",
+    "CREATE INDEX ix_mentions_source ON mentions (source)",
+    "CREATE INDEX ix_mentions_source_id ON mentions (source_id)",
+    "CREATE INDEX ix_mentions_published_at ON mentions (published_at)",
+    f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF mentions DEFAULT",
+]
+
+
+# ---------------------------------------------------------------- periods
+
+def period_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def next_period(p: datetime) -> datetime:
+    return datetime(p.year + 1, 1, 1) if p.month == 12 else datetime(p.year, p.month + 1, 1)
+
+
+def period_label(p: datetime) -> str:
+    return p.strftime("%Y-%m")
+
+
+def partition_name(p: datetime) -> str:
+    return p.strftime("mentions_p%Y_%m")
+
+
+# ---------------------------------------------------------------- schema
+
+def is_postgres(engine=default_engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def is_partitioned(engine=default_engine) -> bool:
+    if not is_postgres(engine):
+        return False
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :t"
+        ), {"t": TABLE}).first() is not None
+
+
+def list_partitions(engine=default_engine) -> Dict[datetime, str]:
+    """Attached monthly partitions keyed by period start (DEFAULT excluded)."""
+    with engine.connect() as conn:
+        names = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :t"
+        ), {"t": TABLE}).scalars().all()
+    out = {}
+    for name in names:
+        try:
+            out[datetime.strptime(name, "mentions_p%Y_%m")] = name
+        except ValueError:
+            continue
+    return out
+
+
+def _create_partition(conn, p: datetime):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(p)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{p.isoformat()}') TO ('{next_period(p).isoformat()}')"
+    ))
+
+
+def _split_default(conn, p: datetime):
+    """Create the partition for `p` from rows that already sit in the DEFAULT partition.
+
+    Postgres refuses CREATE ... PARTITION OF while DEFAULT holds rows for the
+    range (e.g. mentions dated further ahead than PARTITIONS_AHEAD), so the
+    rows are copied into a standalone table which is then attached.
+    """
+    name = partition_name(p)
+    cols = ", ".join(EXPORT_COLUMNS)
+    bounds = {"s": p, "e": next_period(p)}
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)"))
+    conn.execute(text(
+        f"INSERT INTO {name} ({cols}) SELECT {cols} FROM {DEFAULT_PARTITION} "
+        "WHERE published_at >= :s AND published_at < :e"
+    ), bounds)
+    conn.execute(text(
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE published_at >= :s AND published_at < :e"
+    ), bounds)
+    conn.execute(text(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{p.isoformat()}') TO ('{next_period(p).isoformat()}')"
+    ))
+
+
+def ensure_partitions(engine=default_engine, now: Optional[datetime] = None,
+                      since: Optional[datetime] = None):
+    """Pre-create monthly partitions from `since` (default: this month) through PARTITIONS_AHEAD."""
+    if not is_partitioned(engine):
+        return
+    now = now or datetime.utcnow()
+    p = period_start(since or now)
+    last = period_start(now)
+    for _ in range(PARTITIONS_AHEAD):
+        last = next_period(last)
+    existing = list_partitions(engine)
+    while p <= last:
+        if p not in existing:
+            # one transaction per month so a single failure doesn't block the rest
+            try:
+                with engine.begin() as conn:
+                    in_default = conn.execute(text(
+                        f"SELECT 1 FROM {DEFAULT_PARTITION} "
+                        "WHERE published_at >= :s AND published_at < :e LIMIT 1"
+                    ), {"s": p, "e": next_period(p)}).first()
+                    if in_default:
+                        _split_default(conn, p)
+                    else:
+                        _create_partition(conn, p)
+            except Exception as e:
+                print(f"Could not create partition {partition_name(p)}:", e)
+        p = next_period(p)
+
+
+def init_storage(engine=default_engine):
+    """Create the partitioned parent on a fresh Postgres DB; call before create_all."""
+    insp = inspect(engine)
+    if not insp.has_table(TABLE):
+        if is_postgres(engine):
+            with engine.begin() as conn:
+                for stmt in PARTITIONED_DDL:
+                    conn.execute(text(stmt))
+            ensure_partitions(engine)
+        return
+    if is_postgres(engine) and not is_partitioned(engine):
+        print("mentions table is not partitioned; run `python -m app.storage migrate` to convert it")
+    elif is_postgres(engine) and not insp.has_table(MentionSourceId.__tablename__):
+        # partitioned before the registry existed: seed it from the hot table
+        with engine.begin() as conn:
+            MentionSourceId.__table__.create(conn)
+            conn.execute(text(
+                "INSERT INTO mention_source_ids (source_id) SELECT DISTINCT source_id "
+                "FROM mentions WHERE source_id IS NOT NULL ON CONFLICT DO NOTHING"
+            ))
+    # existing tables predate the published_at index
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_mentions_published_at ON mentions (published_at)"))
+
+
+def migrate_to_partitioned(engine=default_engine):
+    """One-off conversion of a plain Postgres mentions table into the partitioned layout."""
+    if not is_postgres(engine):
+        print("Partitioning is Postgres-only; SQLite uses the published_at index.")
+        return
+    if is_partitioned(engine):
+        print("mentions is already partitioned.")
+        return
+    cols = ", ".join(EXPORT_COLUMNS)
+    with engine.begin() as conn:
+        lo = conn.execute(text("SELECT min(published_at) FROM mentions")).scalar()
+        conn.execute(text("ALTER TABLE mentions RENAME TO mentions_legacy"))
+        conn.execute(text("ALTER TABLE mentions_legacy RENAME CONSTRAINT mentions_pkey TO mentions_legacy_pkey"))
+        conn.execute(text("ALTER SEQUENCE IF EXISTS mentions_id_seq RENAME TO mentions_legacy_id_seq"))
+        for ix in ("ix_mentions_id", "ix_mentions_source", "ix_mentions_source_id", "ix_mentions_published_at"):
+            conn.execute(text(f"DROP INDEX IF EXISTS {ix}"))
+        for stmt in PARTITIONED_DDL:
+            conn.execute(text(stmt))
+        p, last = period_start(lo or datetime.utcnow()), period_start(datetime.utcnow())
+        for _ in range(PARTITIONS_AHEAD):
+            last = next_period(last)
+        while p <= last:
+            _create_partition(conn, p)
+            p = next_period(p)
+        legacy_cols = cols.replace("published_at", "COALESCE(published_at, now() AT TIME ZONE 'utc')")
+        conn.execute(text(f"INSERT INTO mentions ({cols}) SELECT {legacy_cols} FROM mentions_legacy"))
+        MentionSourceId.__table__.create(conn, checkfirst=True)
+        conn.execute(text(
+            "INSERT INTO mention_source_ids (source_id) SELECT DISTINCT source_id "
+            "FROM mentions_legacy WHERE source_id IS NOT NULL ON CONFLICT DO NOTHING"
+        ))
+        conn.execute(text("SELECT setval('mentions_id_seq', COALESCE((SELECT max(id) FROM mentions), 0) + 1, false)"))
+        conn.execute(text("DROP TABLE mentions_legacy"))
+    print("mentions converted to a partitioned table.")
+
+
+# ---------------------------------------------------------------- archive
+
+def _period_dir(p: datetime, archive_dir: str) -> str:
+    return os.path.join(archive_dir, TABLE, f"period={period_label(p)}")
+
+
+def _iter_table_batches(conn, tbl, start: datetime, end: datetime,
+                        batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    stmt = select(*[tbl.c[c] for c in EXPORT_COLUMNS]).where(
+        tbl.c.published_at >= start, tbl.c.published_at < end)
+    stmt = stmt.order_by(tbl.c.published_at.asc(), tbl.c.id.asc())
+    result = conn.execute(stmt, execution_options={"yield_per": batch_size})
+    for partition in result.partitions():
+        yield [row._asdict() for row in partition]
+
+
+def _write_archive(batches: Iterator[List[Dict]], p: datetime, archive_dir: str):
+    """Write batches to a new part file for period `p`; returns (path, rows) or (None, 0)."""
+    folder = _period_dir(p, archive_dir)
+    os.makedirs(folder, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    final = os.path.join(folder, f"part-{stamp}.parquet")
+    tmp = os.path.join(folder, f".part-{stamp}.parquet.tmp")
+    schema = arrow_schema()
+    rows = 0
+    writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+    try:
+        for batch in batches:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            rows += len(batch)
+    except Exception:
+        writer.close()
+        os.remove(tmp)
+        raise
+    writer.close()
+    if rows == 0:
+        os.remove(tmp)
+        return None, 0
+    os.replace(tmp, final)
+    return final, rows
+
+
+def _lock_for_archive(conn, relation: str):
+    """Block writers to `relation` until the archive transaction ends; reads carry on.
+
+    Without this, a transaction that inserted (or updated) rows before the
+    dump but commits after it would be deleted or dropped unarchived.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"LOCK TABLE {relation} IN EXCLUSIVE MODE"))
+    else:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _archive_partition(engine, p: datetime, name: str, archive_dir: str) -> int:
+    """Dump a monthly partition to Parquet, then detach and drop it.
+
+    Dump, DETACH and DROP share one transaction holding the partition
+    write-locked, so nothing can change between the dump and the drop. The
+    file is removed if the transaction fails; a crash after the file lands
+    but before the commit can leave a duplicate archive copy, never a loss.
+    """
+    tbl = table(name, *[column(c) for c in EXPORT_COLUMNS])
+    with engine.connect() as conn:
+        _lock_for_archive(conn, name)
+        path, rows = _write_archive(_iter_table_batches(conn, tbl, p, next_period(p)), p, archive_dir)
+        try:
+            conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            if path:
+                os.remove(path)
+            raise
+    return rows
+
+
+def _archive_rows(engine, p: datetime, archive_dir: str) -> int:
+    """Move rows of period `p` from the hot table (or DEFAULT partition) to Parquet.
+
+    Same guarantee as _archive_partition: the relation holding the rows is
+    write-locked from the dump until the DELETE commits.
+    """
+    start, end = p, next_period(p)
+    mentions = Mention.__table__
+    relation = DEFAULT_PARTITION if is_partitioned(engine) else TABLE
+    with engine.connect() as conn:
+        _lock_for_archive(conn, relation)
+        path, rows = _write_archive(_iter_table_batches(conn, mentions, start, end), p, archive_dir)
+        if path is None:
+            conn.rollback()
+            return 0
+        try:
+            conn.execute(delete(mentions).where(
+                mentions.c.published_at >= start, mentions.c.published_at < end))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            os.remove(path)
+            raise
+    return rows
+
+
+def compact(engine=default_engine, now: Optional[datetime] = None,
+            retention_days: int = HOT_RETENTION_DAYS,
+            archive_dir: str = ARCHIVE_DIR) -> Dict[str, int]:
+    """Archive every whole month older than the retention window; returns rows per period."""
+    if retention_days <= 0:
+        return {}
+    if pq is None:
+        raise RuntimeError("Archival requires pyarrow to be installed")
+    now = now or datetime.utcnow()
+    cutoff = period_start(now - timedelta(days=retention_days))
+    archived: Dict[str, int] = {}
+    if is_partitioned(engine):
+        for p, name in sorted(list_partitions(engine).items()):
+            if next_period(p) <= cutoff:
+                archived[period_label(p)] = _archive_partition(engine, p, name, archive_dir)
+    # whatever is left: SQLite rows, or stragglers in the Postgres DEFAULT partition
+    with engine.connect() as conn:
+        oldest = conn.execute(
+            select(func.min(Mention.published_at)).where(Mention.published_at < cutoff)
+        ).scalar()
+    p = period_start(oldest) if oldest else cutoff
+    while p < cutoff:
+        rows = _archive_rows(engine, p, archive_dir)
+        if rows:
+            archived[period_label(p)] = archived.get(period_label(p), 0) + rows
+        p = next_period(p)
+    for label, rows in archived.items():
+        print(f"[{datetime.utcnow().isoformat()}] archived {rows} mentions for {label}.")
+    return archived
+
+
+def _iter_file_batches(path: str, start, end, source, batch_size: int) -> Iterator[List[Dict]]:
+    import pyarrow.compute as pc
+    pf = pq.ParquetFile(path)
+    for rb in pf.iter_batches(batch_size=batch_size):
+        conds = []
+        if start is not None:
+            conds.append(pc.greater_equal(rb.column("published_at"), pa.scalar(start, pa.timestamp("us"))))
+        if end is not None:
+            conds.append(pc.less(rb.column("published_at"), pa.scalar(end, pa.timestamp("us"))))
+        if source:
+            conds.append(pc.equal(rb.column("source"), source))
+        mask = None
+        for c in conds:
+            mask = c if mask is None else pc.and_(mask, c)
+        if mask is not None:
+            rb = rb.filter(mask)
+        if rb.num_rows:
+            yield rb.to_pylist()
+
+
+def iter_archived_batches(start: Optional[datetime] = None,
+                          end: Optional[datetime] = None,
+                          source: Optional[str] = None,
+                          batch_size: int = EXPORT_BATCH_SIZE,
+                          archive_dir: str = ARCHIVE_DIR) -> Iterator[List[Dict]]:
+    """Yield archived mentions matching the filters, sorted by (published_at, id).
+
+    Months never overlap, and each part file is written sorted, so parts of
+    one month are merged and months are emitted in order. The file list is
+    taken up front so the stream reflects one archive state.
+    """
+    root = os.path.join(archive_dir, TABLE)
+    if pq is None or not os.path.isdir(root):
+        return
+    start, end = naive_utc(start), naive_utc(end)
+    periods = []
+    for entry in sorted(os.listdir(root)):
+        try:
+            p = datetime.strptime(entry, "period=%Y-%m")
+        except ValueError:
+            continue
+        if (end is not None and p >= end) or (start is not None and next_period(p) <= start):
+            continue
+        folder = os.path.join(root, entry)
+        parts = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".parquet"))
+        periods.append(parts)
+    for parts in periods:
+        yield from merge_batches(
+            [_iter_file_batches(path, start, end, source, batch_size) for path in parts], batch_size)
+
+
+# ---------------------------------------------------------------- scheduling
+
+@contextmanager
+def lifecycle_lock(engine=default_engine, archive_dir: str = ARCHIVE_DIR, shared: bool = False):
+    """Yield True if this process holds the lifecycle lock, False if another one does.
+
+    Every uvicorn worker runs the lifecycle loop; only the exclusive holder
+    may compact, otherwise rows get archived twice. Exports take the lock
+    shared (waiting for a running compaction) so rows can't move between
+    the archive and the hot table mid-stream. Postgres uses an advisory
+    lock, SQLite a flock on a file in the archive directory.
+    """
+    if is_postgres(engine):
+        acquire, release = (("pg_advisory_lock_shared", "pg_advisory_unlock_shared") if shared
+                            else ("pg_try_advisory_lock", "pg_advisory_unlock"))
+        with engine.connect() as conn:
+            res = conn.execute(text(f"SELECT {acquire}(:k)"), {"k": LIFECYCLE_LOCK_KEY}).scalar()
+            conn.commit()
+            acquired = shared or bool(res)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    conn.execute(text(f"SELECT {release}(:k)"), {"k": LIFECYCLE_LOCK_KEY})
+                    conn.commit()
+        return
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(archive_dir, exist_ok=True)
+    with open(os.path.join(archive_dir, ".lifecycle.lock"), "a") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_SH if shared else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def locked_export(chunks: Iterator[bytes], engine=default_engine,
+                  retention_days: int = HOT_RETENTION_DAYS,
+                  archive_dir: str = ARCHIVE_DIR) -> Iterator[bytes]:
+    """Stream `chunks` while holding the lifecycle lock shared, if compaction can run at all."""
+    if retention_days <= 0:
+        yield from chunks
+        return
+    with lifecycle_lock(engine, archive_dir, shared=True):
+        yield from chunks
+
+
+def run_lifecycle_once(engine=default_engine, retention_days: int = HOT_RETENTION_DAYS,
+                       archive_dir: str = ARCHIVE_DIR):
+    """One lifecycle pass; returns rows archived per period, or None if another process holds the lock."""
+    partitioned = is_partitioned(engine)
+    if not partitioned and retention_days <= 0:
+        return {}  # nothing to maintain: don't take locks or touch ARCHIVE_DIR
+    with lifecycle_lock(engine, archive_dir) as acquired:
+        if not acquired:
+            return None
+        if partitioned:
+            try:
+                ensure_partitions(engine)
+            except Exception as e:
+                # compaction must still run, it also drains expired DEFAULT rows
+                print("Partition upkeep error:", e)
+        return compact(engine, retention_days=retention_days, archive_dir=archive_dir)
+
+
+async def run_periodic_lifecycle(interval_seconds: int = LIFECYCLE_INTERVAL_SECONDS):
+    """Keep partitions pre-created and compact expired data every `interval_seconds`."""
+    while True:
+        try:
+            await asyncio.to_thread(run_lifecycle_once)
+        except Exception as e:
+            print("Storage lifecycle error:", e)
+        await asyncio.sleep(interval_seconds)
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "compact"
+    if cmd == "init":
+        init_storage()
+    elif cmd == "partitions":
+        with lifecycle_lock() as acquired:
+            if acquired:
+                ensure_partitions()
+            else:
+                print("Another process holds the storage lifecycle lock.")
+    elif cmd == "migrate":
+        migrate_to_partitioned()
+    elif cmd == "compact":
+        result = run_lifecycle_once()
+        print("Another process holds the storage lifecycle lock." if result is None else result)
+    else:
+        print("usage: python -m app.storage [init|partitions|compact|migrate]")
+        sys.exit(2)
@@ -1,5 +1,6 @@
 # services/backend/app/tasks.py
 import asyncio
+import json
 import time
 from datetime import datetime, timedelta
 import numpy as np
@@ -9,6 +10,8 @@ from sqlalchemy.orm import Session
 from app.db import SessionLocal
 from app.models import Mention, Alert
 from app.nlp import embed_texts
+from app import topics
+from app.clustering import representative_mentions, stabilize_labels
 from app.ws_manager import ConnectionManager
 
 # parameters (tweak as needed)
@@ -20,6 +23,9 @@ SPIKE_THRESHOLD_K = 3.0       # trigger if current count > mean + K*std
 # This manager is imported from main (we will set it in main)
 manager: ConnectionManager = None
 
+# centroids from the previous clustering cycle, keyed by stable topic id
+_prev_centers = {}
+
 async def run_periodic_tasks(interval_seconds: int = 60):
     """Main background loop: cluster and detect spikes every `interval_seconds`."""
     while True:
@@ -36,6 +42,12 @@ async def cluster_recent_mentions():
         cutoff = datetime.utcnow() - timedelta(minutes=CLUSTER_WINDOW_MINUTES)
         rows = db.query(Mention).filter(Mention.published_at >= cutoff).all()
         if not rows:
+            # window emptied: drop cached topics (clients get a "removed" diff)
+            # and forget old centroids so ids restart from 0
+            _prev_centers.clear()
+            diff = topics.refresh_topics([], [], {})
+            if diff and manager:
+                await manager.broadcast(json.dumps(diff))
             return
         texts = [r.text or "" for r in rows]
         embeddings = embed_texts(texts)  # numpy array
@@ -43,17 +55,26 @@ async def cluster_recent_mentions():
         k = min(len(rows), CLUSTERS)
         if k <= 1:
             # assign all to cluster 0
-            for r in rows:
-                r.cluster_id = 0
-            db.commit()
-            return
-        model = MiniBatchKMeans(n_clusters=k, random_state=42, batch_size=32)
-        labels = model.fit_predict(embeddings)
+            labels = np.zeros(len(rows), dtype=int)
+            centers = embeddings.mean(axis=0, keepdims=True)
+        else:
+            model = MiniBatchKMeans(n_clusters=k, random_state=42, batch_size=32)
+            labels = model.fit_predict(embeddings)
+            centers = model.cluster_centers_
+        # each fit numbers clusters arbitrarily; keep ids stable across cycles
+        labels, centers = stabilize_labels(labels, centers, _prev_centers)
+        _prev_centers.clear()
+        _prev_centers.update(centers)
         # write labels back
         for r, lab in zip(rows, labels):
             r.cluster_id = int(lab)
+        # summarise once per cycle (before commit expires the loaded rows);
+        # clients get a compact diff, the full view is cached for /api/topics
+        reps = representative_mentions(rows, labels, embeddings, centers)
+        diff = topics.refresh_topics(rows, labels, reps)
         db.commit()
-        # optional: broadcast cluster info for UI (we'll skip heavy payloads)
+        if diff and manager:
+            await manager.broadcast(json.dumps(diff))
         print(f"[{datetime.utcnow().isoformat()}] clustered {len(rows)} mentions into {k} topics.")
     finally:
         db.close()
@@ -116,7 +137,7 @@ def create_alert(db: Session, alert_type: str, message: str):
     try:
         if manager:
             # ensure async broadcast; manager.broadcast is async
-            asyncio.create_task(manager.broadcast(__import__("json").dumps(payload)))
+            asyncio.create_task(manager.broadcast(json.dumps(payload)))
         else:
             print("Alert created (no WS manager):", payload)
     except Exception as e:
@@ -0,0 +1,159 @@
+# services/backend/app/topics.py
+"""Cached per-topic summaries for the clustering loop.
+
+Keywords come from a class-based TF-IDF (c-TF-IDF): every cluster is
+treated as one document, and a term scores highly when it is frequent in
+that cluster but rare across clusters. Term counts are sparse Counters
+kept per mention and per cluster, and are updated incrementally as
+mentions join, move between, or leave clusters, so each mention is
+tokenized once while it stays in the clustering window.
+"""
+import math
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+TOP_KEYWORDS = 8
+REPRESENTATIVE_TEXT_CHARS = 280
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'_-]+")
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no nor
+not now of off on once only or other our ours ourselves out over own same she
+should so some such than that the their theirs them themselves then there these
+they this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours yourself yourselves
+i'm it's don't can't rt http https www com amp
+""".split())
+
+
+def tokenize(text: str) -> Counter:
+    return Counter(t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS)
+
+
+def _apply(counter: Counter, terms: Counter, sign: int):
+    for term, n in terms.items():
+        v = counter[term] + sign * n
+        if v > 0:
+            counter[term] = v
+        else:
+            del counter[term]
+
+
+class TopicIndex:
+    """Sparse term counts per mention and per cluster, maintained incrementally."""
+
+    def __init__(self):
+        self.doc_terms: Dict[int, Counter] = {}
+        self.doc_class: Dict[int, int] = {}
+        self.class_terms: Dict[int, Counter] = {}
+        self.term_freq: Counter = Counter()     # term counts across all clusters
+
+    def assign(self, mention_id: int, text: str, cluster_id: int):
+        old = self.doc_class.get(mention_id)
+        if old == cluster_id:
+            return
+        terms = self.doc_terms.get(mention_id)
+        if terms is None:
+            terms = self.doc_terms[mention_id] = tokenize(text)
+            _apply(self.term_freq, terms, 1)
+        elif old is not None:
+            _apply(self.class_terms.setdefault(old, Counter()), terms, -1)
+        _apply(self.class_terms.setdefault(cluster_id, Counter()), terms, 1)
+        self.doc_class[mention_id] = cluster_id
+
+    def retain(self, mention_ids: Iterable[int]):
+        """Forget mentions that have left the clustering window."""
+        keep = set(mention_ids)
+        for mid in [m for m in self.doc_terms if m not in keep]:
+            terms = self.doc_terms.pop(mid)
+            cid = self.doc_class.pop(mid, None)
+            if cid is not None:
+                _apply(self.class_terms.setdefault(cid, Counter()), terms, -1)
+            _apply(self.term_freq, terms, -1)
+        # a cluster whose members have no usable tokens has empty counts but
+        # is still referenced, so only drop clusters nobody belongs to
+        live = set(self.doc_class.values())
+        for cid in [c for c in self.class_terms if c not in live]:
+            del self.class_terms[cid]
+
+    def keywords(self, cluster_id: int, top_n: int = TOP_KEYWORDS) -> List[List]:
+        terms = self.class_terms.get(cluster_id)
+        if not terms:
+            return []
+        total = sum(terms.values())
+        # A = average number of terms per cluster
+        avg = sum(self.term_freq.values()) / max(1, len(self.class_terms))
+        scores = {
+            t: (n / total) * math.log(1 + avg / self.term_freq[t])
+            for t, n in terms.items()
+        }
+        best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+        return [[t, round(s, 4)] for t, s in best]
+
+
+# in-process cache, refreshed once per clustering cycle
+_index = TopicIndex()
+_cache: Dict = {"updated_at": None, "topics": {}}
+
+
+def _representative(m) -> Optional[dict]:
+    if m is None:
+        return None
+    return {
+        "id": m.id,
+        "source": m.source,
+        "author": m.author,
+        "text": (m.text or "")[:REPRESENTATIVE_TEXT_CHARS],
+        "url": m.url,
+    }
+
+
+def refresh_topics(rows, labels, representatives: Dict[int, object]) -> Optional[dict]:
+    """Rebuild topic summaries from one clustering cycle.
+
+    rows: clustered Mention objects; labels: cluster id per row;
+    representatives: cluster id -> Mention closest to the centroid.
+    Returns a compact diff message for WS clients, or None if nothing changed.
+    """
+    members: Dict[int, list] = {}
+    for m, lab in zip(rows, labels):
+        lab = int(lab)
+        _index.assign(m.id, m.text, lab)
+        members.setdefault(lab, []).append(m)
+    _index.retain(m.id for m in rows)
+
+    topics = {}
+    for cid, ms in members.items():
+        sentiment = Counter((m.sentiment or "unknown").lower() for m in ms)
+        topics[cid] = {
+            "cluster_id": cid,
+            "size": len(ms),
+            "sentiment": dict(sentiment),
+            "keywords": _index.keywords(cid),
+            "representative": _representative(representatives.get(cid)),
+        }
+
+    previous = _cache["topics"]
+    upserted = [t for cid, t in topics.items() if previous.get(cid) != t]
+    removed = [cid for cid in previous if cid not in topics]
+    _cache["topics"] = topics
+    _cache["updated_at"] = datetime.utcnow().isoformat()
+    if not upserted and not removed:
+        return None
+    return {
+        "type": "topics",
+        "updated_at": _cache["updated_at"],
+        "upserted": upserted,
+        "removed": removed,
+    }
+
+
+def get_topics() -> dict:
+    """Cached summaries, largest topic first."""
+    topics = sorted(_cache["topics"].values(), key=lambda t: t["size"], reverse=True)
+    return {"updated_at": _cache["updated_at"], "topics": topics}
@@ -16,6 +16,10 @@ if 'cluster_id' not in columns:
     conn.commit()
     print('cluster_id column added!')
     
+# Time-window queries (and retention compaction) filter on published_at
+cursor.execute('CREATE INDEX IF NOT EXISTS ix_mentions_published_at ON mentions (published_at)')
+conn.commit()
+    
 # Check if alerts table exists
 cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='alerts'")
 alerts_exists = cursor.fetchone()
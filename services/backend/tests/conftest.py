@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+import pytest
+
+# app.db builds its engine at import time, so point it at a scratch DB first
+_tmp = tempfile.mkdtemp(prefix="brandguard-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["ARCHIVE_DIR"] = os.path.join(_tmp, "archive")
+
+from app.db import SessionLocal, engine  # noqa: E402
+from app.models import Base  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Session on a freshly emptied scratch database."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+from app.clustering import representative_mentions, stabilize_labels  # noqa: E402
+
+
+def test_first_cycle_keeps_fit_labels():
+    centers = np.array([[0.0, 0.0], [10.0, 10.0], [20.0, 0.0]])
+    labels, by_id = stabilize_labels(np.array([0, 1, 2, 2]), centers, {})
+    assert labels.tolist() == [0, 1, 2, 2]
+    assert sorted(by_id) == [0, 1, 2]
+
+
+def test_second_cycle_matches_previous_centroids():
+    _, prev = stabilize_labels(
+        np.array([0, 1, 2]), np.array([[0.0, 0.0], [10.0, 10.0], [20.0, 0.0]]), {})
+    # same three topics, drifted and renumbered by the new fit
+    centers = np.array([[20.5, 0.0], [0.2, 0.0], [10.0, 9.0]])
+    labels, by_id = stabilize_labels(np.array([0, 1, 2, 0]), centers, prev)
+    assert labels.tolist() == [2, 0, 1, 2]
+    assert np.allclose(by_id[2], [20.5, 0.0])
+
+
+def test_unmatched_clusters_take_lowest_free_ids():
+    prev = {0: np.array([0.0, 0.0]), 2: np.array([20.0, 0.0])}
+    centers = np.array([[50.0, 50.0], [19.0, 1.0], [0.0, 1.0], [70.0, 70.0]])
+    labels, by_id = stabilize_labels(np.array([0, 1, 2, 3]), centers, prev)
+    assert labels[1] == 2 and labels[2] == 0
+    assert sorted(labels[[0, 3]].tolist()) == [1, 3]
+    assert sorted(by_id) == [0, 1, 2, 3]
+
+
+def test_fewer_clusters_than_before():
+    prev = {0: np.array([0.0, 0.0]), 1: np.array([10.0, 10.0]), 2: np.array([20.0, 0.0])}
+    labels, by_id = stabilize_labels(np.array([0, 0]), np.array([[9.0, 9.0]]), prev)
+    assert labels.tolist() == [1, 1] and list(by_id) == [1]
+
+
+def test_representative_is_nearest_to_centroid():
+    emb = np.array([[0.0, 0.0], [1.0, 1.0], [10.0, 10.0], [12.0, 12.0]])
+    centers = {5: np.array([0.9, 0.9]), 7: np.array([11.5, 11.5])}
+    reps = representative_mentions(list("abcd"), np.array([5, 5, 7, 7]), emb, centers)
+    assert reps == {5: "b", 7: "d"}
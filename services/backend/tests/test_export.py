@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.models import Mention  # noqa: E402
+
+T0 = datetime(2025, 1, 1)
+client = TestClient(app)
+
+
+@pytest.fixture
+def mentions(db):
+    for i in range(25):
+        db.add(Mention(
+            source="twitter" if i % 2 else "reddit",
+            source_id=f"s{i}",
+            text=f'hi, "{i}"\nsecond line',
+            published_at=T0 + timedelta(hours=i),
+        ))
+    db.commit()
+
+
+def export(**params):
+    r = client.get("/api/mentions/export", params=params)
+    assert r.status_code == 200
+    return r
+
+
+def test_ndjson_round_trip(mentions):
+    rows = [json.loads(line) for line in export(format="ndjson").text.splitlines()]
+    assert len(rows) == 25
+    assert [r["source_id"] for r in rows] == [f"s{i}" for i in range(25)]
+    assert rows[3]["text"] == 'hi, "3"\nsecond line'
+
+
+def test_csv_round_trip(mentions):
+    rows = list(csv.DictReader(io.StringIO(export(format="csv", source="twitter").text)))
+    assert len(rows) == 12
+    assert {r["source"] for r in rows} == {"twitter"}
+
+
+def test_parquet_round_trip(mentions):
+    table = pq.read_table(io.BytesIO(export(format="parquet").content))
+    assert table.num_rows == 25
+    assert table.schema.field("published_at").type == pa.timestamp("us")
+
+
+def test_arrow_round_trip(mentions):
+    table = pa.ipc.open_stream(export(format="arrow").content).read_all()
+    assert table.num_rows == 25
+
+
+def test_end_is_exclusive(mentions):
+    rows = export(format="ndjson", start="2025-01-01T02:00:00", end="2025-01-01T05:00:00").text.splitlines()
+    assert [json.loads(r)["source_id"] for r in rows] == ["s2", "s3", "s4"]
+
+
+def test_tz_aware_bounds_are_normalised(mentions):
+    # 07:00+05:00 == 02:00Z and 05:00Z == 05:00 naive UTC
+    rows = export(format="ndjson", start="2025-01-01T07:00:00+05:00", end="2025-01-01T05:00:00Z").text.splitlines()
+    assert [json.loads(r)["source_id"] for r in rows] == ["s2", "s3", "s4"]
+
+
+def test_unknown_format_is_rejected(mentions):
+    r = client.get("/api/mentions/export", params={"format": "xml"})
+    assert r.status_code == 400
+
+
+def test_archived_batches_are_merged_in_order(mentions):
+    from app.export import stream_export
+
+    # an archived month plus a straggler older than some hot rows
+    archived = [[
+        {"id": 100, "source": "reddit", "source_id": "a0", "author": None, "text": "old",
+         "url": None, "published_at": T0 - timedelta(days=1), "sentiment": None,
+         "reach": None, "cluster_id": None},
+        {"id": 101, "source": "reddit", "source_id": "a1", "author": None, "text": "mid",
+         "url": None, "published_at": T0 + timedelta(hours=5, minutes=30), "sentiment": None,
+         "reach": None, "cluster_id": None},
+    ]]
+    body = b"".join(stream_export("ndjson", archived_batches=iter(archived), batch_size=4))
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert len(rows) == 27
+    assert [r["published_at"] for r in rows] == sorted(r["published_at"] for r in rows)
+    assert rows[0]["source_id"] == "a0" and rows[7]["source_id"] == "a1"
@@ -0,0 +1,16 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+
+from app.main import app
+from app.models import Mention, MentionSourceId
+
+
+def test_duplicate_source_id_is_rejected(db):
+    client = TestClient(app, raise_server_exceptions=True)
+    payload = {"source": "twitter", "source_id": "dup-1", "text": "hello"}
+    assert client.post("/api/mentions", json=payload).status_code == 200
+    with pytest.raises(IntegrityError):
+        client.post("/api/mentions", json=payload)
+    assert db.query(Mention).count() == 1
+    assert db.query(MentionSourceId).count() == 1
@@ -0,0 +1,106 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pyarrow")
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import storage  # noqa: E402
+from app.models import Base, Mention  # noqa: E402
+
+NOW = datetime(2026, 10, 19)
+CUTOFF = datetime(2026, 8, 1)   # 60 days back from NOW, rounded down to the month
+
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'storage.db'}", future=True)
+    Base.metadata.create_all(bind=eng)
+    with Session(eng) as db:
+        # one mention every 12h from mid-May to NOW
+        for i in range(320):
+            db.add(Mention(
+                source="twitter" if i % 2 else "reddit",
+                source_id=f"s{i}",
+                text=f"t{i}",
+                published_at=NOW - timedelta(hours=12 * i),
+            ))
+        db.commit()
+    yield eng
+    eng.dispose()
+
+
+def count(eng, *where):
+    with eng.connect() as conn:
+        return conn.execute(select(func.count()).select_from(Mention).where(*where)).scalar()
+
+
+def archived_rows(archive_dir, **filters):
+    return [r for b in storage.iter_archived_batches(archive_dir=archive_dir, **filters) for r in b]
+
+
+def test_compact_moves_only_months_before_cutoff(engine, tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    old = count(engine, Mention.published_at < CUTOFF)
+    hot = count(engine, Mention.published_at >= CUTOFF)
+
+    result = storage.compact(engine, now=NOW, retention_days=60, archive_dir=archive_dir)
+
+    assert sum(result.values()) == old
+    assert sorted(result) == ["2026-05", "2026-06", "2026-07"]
+    assert count(engine, Mention.published_at < CUTOFF) == 0
+    assert count(engine) == hot
+    for label in result:
+        folder = os.path.join(archive_dir, "mentions", f"period={label}")
+        assert [f for f in os.listdir(folder) if f.endswith(".parquet")]
+
+    rows = archived_rows(archive_dir)
+    assert len(rows) == old
+    keys = [(r["published_at"], r["id"]) for r in rows]
+    assert keys == sorted(keys)
+
+    # second run has nothing left to move
+    assert storage.compact(engine, now=NOW, retention_days=60, archive_dir=archive_dir) == {}
+
+
+def test_archived_rows_honour_filters(engine, tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    storage.compact(engine, now=NOW, retention_days=60, archive_dir=archive_dir)
+    start, end = datetime(2026, 6, 10), datetime(2026, 7, 5)
+
+    rows = archived_rows(archive_dir, start=start, end=end, source="twitter")
+
+    assert rows
+    assert all(start <= r["published_at"] < end for r in rows)
+    assert {r["source"] for r in rows} == {"twitter"}
+    everything = archived_rows(archive_dir)
+    expected = [r for r in everything
+                if start <= r["published_at"] < end and r["source"] == "twitter"]
+    assert len(rows) == len(expected)
+
+
+def test_zero_retention_is_a_no_op(engine, tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    before = count(engine)
+
+    assert storage.compact(engine, now=NOW, retention_days=0, archive_dir=archive_dir) == {}
+    assert storage.run_lifecycle_once(engine, retention_days=0, archive_dir=archive_dir) == {}
+
+    assert count(engine) == before
+    assert not os.path.exists(archive_dir)
+
+
+def test_lifecycle_skips_while_lock_is_held(engine, tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    before = count(engine)
+
+    with storage.lifecycle_lock(engine, archive_dir) as acquired:
+        assert acquired
+        assert storage.run_lifecycle_once(engine, retention_days=60, archive_dir=archive_dir) is None
+    assert count(engine) == before
+
+    # lock released: the pass runs
+    assert storage.run_lifecycle_once(engine, retention_days=60, archive_dir=archive_dir)
+    assert count(engine) < before
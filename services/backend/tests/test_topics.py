@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import topics
+from app.topics import TopicIndex, refresh_topics
+
+
+@pytest.fixture(autouse=True)
+def fresh_topic_cache(monkeypatch):
+    """refresh_topics keeps module-level state; give every test its own."""
+    monkeypatch.setattr(topics, "_index", TopicIndex())
+    monkeypatch.setattr(topics, "_cache", {"updated_at": None, "topics": {}})
+
+
+def test_empty_token_cluster_can_be_reassigned():
+    idx = TopicIndex()
+    idx.assign(1, "🔥🔥 rt", 0)
+    idx.assign(2, "great product", 1)
+    idx.retain([1, 2])
+    idx.assign(1, "🔥🔥 rt", 1)
+    idx.retain([1, 2])
+    assert idx.doc_class == {1: 1, 2: 1}
+    assert 0 not in idx.class_terms
+
+
+def test_empty_token_mention_leaves_window():
+    idx = TopicIndex()
+    idx.assign(1, "", 0)
+    idx.retain([1])
+    idx.retain([])
+    assert idx.doc_terms == {} and idx.class_terms == {} and not idx.term_freq
+
+
+def test_keywords_prefer_terms_unique_to_cluster():
+    idx = TopicIndex()
+    idx.assign(1, "battery drains fast", 0)
+    idx.assign(2, "battery dies fast", 0)
+    idx.assign(3, "camera is fast", 1)
+    assert idx.keywords(0)[0][0] == "battery"
+    assert idx.keywords(1)[0][0] == "camera"
+
+
+def test_refresh_topics_handles_blank_mentions():
+    rows = [
+        SimpleNamespace(id=1, text="", sentiment=None, source="x", author="a", url=None),
+        SimpleNamespace(id=2, text="love it", sentiment="positive", source="x", author="b", url=None),
+    ]
+    diff = refresh_topics(rows, [0, 1], {0: rows[0], 1: rows[1]})
+    assert {t["cluster_id"] for t in diff["upserted"]} == {0, 1}
+    diff = refresh_topics(rows, [1, 1], {1: rows[1]})
+    assert diff["removed"] == [0]
+
+
+def test_empty_window_clears_cached_topics():
+    rows = [SimpleNamespace(id=1, text="battery dies", sentiment="negative",
+                            source="x", author="a", url=None)]
+    refresh_topics(rows, [3], {3: rows[0]})
+    assert topics.get_topics()["topics"]
+
+    diff = refresh_topics([], [], {})
+
+    assert diff["removed"] == [3] and diff["upserted"] == []
+    assert topics.get_topics()["topics"] == []
+    assert topics._index.doc_terms == {} and topics._index.class_terms == {}
+    assert refresh_topics([], [], {}) is None